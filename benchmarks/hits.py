@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Measure the latency and multi-threaded throughput of cache hits.
+
+Hits are served lock-free. For comparison, the same hits are also served the way
+they were before: under the cache lock, through ``CacheEntry.res``, shrinking the
+cache after every call.
+
+Usage: python benchmarks/hits.py [--threads 1 2 4 8] [--seconds 1.0] [--only MODE]
+"""
+import argparse
+import functools
+import inspect
+import threading
+import timeit
+from time import perf_counter
+from typing import Any, Callable
+
+import reckon
+from reckon import protos
+
+cache = reckon.local()
+KEYS = 64
+
+
+def locked(func: Callable) -> Callable:
+    """Memoize `func` in `cache`, serving hits as they were before going lock-free."""
+
+    @functools.wraps(func)
+    def _memoized(*args, **kwargs) -> Any:
+        with cache._lock:
+            bound = inspect.signature(func).bind(*args, **kwargs)
+            key = hash(frozenset(set(bound.arguments.items()) | {func}))
+            entry = cache._cache.get(key)
+            if entry is None:
+                entry = protos._create_entry(
+                    func=func,
+                    key=key,
+                    args=args,
+                    kwargs=kwargs,
+                    strategy=cache.strategy,
+                )
+                cache[key] = entry
+                cache._misses += 1
+            else:
+                cache._base_hits += 1
+            result = entry.res
+            cache.shrink()
+            return result
+
+    return _memoized
+
+
+def _ident(x):
+    return x
+
+
+MODES = {"lock-free": cache.memoize(_ident), "locked": locked(_ident)}
+
+
+def latency(ident: Callable, number: int) -> float:
+    """The mean time, in seconds, of a single hit."""
+    ident(1)
+    return min(timeit.repeat(lambda: ident(1), number=number, repeat=5)) / number
+
+
+def throughput(ident: Callable, threads: int, seconds: float) -> float:
+    """The total number of hits per second across all threads."""
+    [ident(x) for x in range(KEYS)]
+    counts = [0] * threads
+    start = threading.Barrier(threads + 1)
+    done = threading.Event()
+
+    def worker(i: int):
+        start.wait()
+        n = 0
+        while not done.is_set():
+            for x in range(KEYS):
+                ident(x)
+            n += KEYS
+        counts[i] = n
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    start.wait()
+    begin = perf_counter()
+    done.wait(seconds)
+    done.set()
+    for t in pool:
+        t.join()
+    return sum(counts) / (perf_counter() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--number", type=int, default=20_000)
+    parser.add_argument("--only", choices=[*MODES], help="Only measure this mode.")
+    args = parser.parse_args()
+
+    modes = [args.only] if args.only else [*MODES]
+    for mode in modes:
+        ident = MODES[mode]
+        cache.clear()
+        print(f"{mode} hit latency: {latency(ident, args.number) * 1e6:.2f}us")
+        for threads in args.threads:
+            rate = throughput(ident, threads, args.seconds)
+            print(f"{mode} hit throughput ({threads} threads): {rate:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,32 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
 import enum
-from typing import Callable
+import functools
+import pickle
+from typing import Any, Callable
 
-from reckon import glob, loc
-from reckon.protos import CacheStrategy
+from reckon import glob, loc, prof, rem, tune
+from reckon.prof import profile
+from reckon.protos import CacheStrategy, _DEFAULT_STREAM_LIMIT
 from reckon.util import size
 
 
-__all__ = ("glob", "loc", "memoize", "CacheLocale", "local", "size", "CacheStrategy")
+__all__ = (
+    "glob",
+    "loc",
+    "prof",
+    "rem",
+    "tune",
+    "memoize",
+    "memoize_method",
+    "cached_property",
+    "CacheLocale",
+    "local",
+    "remote",
+    "profile",
+    "size",
+    "CacheStrategy",
+)
 
 
 class CacheLocale(str, enum.Enum):
@@ -17,6 +35,47 @@ class CacheLocale(str, enum.Enum):
 
 
 def memoize(
+    _func: Callable = None,
+    *,
+    locale: CacheLocale = CacheLocale.GLOB,
+    strategy: CacheStrategy = CacheStrategy.DYN,
+    max_mem_usage: float = None,
+    stream_limit: int = _DEFAULT_STREAM_LIMIT
+):
+    locale = CacheLocale(locale)
+    if locale == CacheLocale.GLOB:
+        if max_mem_usage is not None:
+            glob.set_usage(max_mem_usage)
+        memo = functools.partial(glob.memoize, stream_limit=stream_limit)
+        return memo(_func) if _func else memo
+    else:
+        return loc.memoize(
+            _func,
+            target_usage=max_mem_usage,
+            strategy=strategy,
+            stream_limit=stream_limit,
+        )
+
+
+def memoize_method(
+    _func: Callable = None,
+    *,
+    locale: CacheLocale = CacheLocale.GLOB,
+    strategy: CacheStrategy = CacheStrategy.DYN,
+    max_mem_usage: float = None
+):
+    locale = CacheLocale(locale)
+    if locale == CacheLocale.GLOB:
+        if max_mem_usage is not None:
+            glob.set_usage(max_mem_usage)
+        return glob.memoize_method(_func) if _func else glob.memoize_method
+    else:
+        return loc.memoize_method(
+            _func, target_usage=max_mem_usage, strategy=strategy
+        )
+
+
+def cached_property(
     _func: Callable = None,
     *,
     locale: CacheLocale = CacheLocale.GLOB,
@@ -27,10 +86,39 @@ def memoize(
     if locale == CacheLocale.GLOB:
         if max_mem_usage is not None:
             glob.set_usage(max_mem_usage)
-        return glob.memoize(_func) if _func else glob.memoize
+        return glob.cached_property(_func) if _func else glob.cached_property
     else:
-        return loc.memoize(_func, target_usage=max_mem_usage, strategy=strategy)
+        return loc.cached_property(
+            _func, target_usage=max_mem_usage, strategy=strategy
+        )
+
+
+def local(
+    max_mem_usage: float = None,
+    strategy: CacheStrategy = CacheStrategy.DYN,
+    max_size: int = None,
+):
+    return loc.LocalCache(
+        target_usage=max_mem_usage, strategy=strategy, max_size=max_size
+    )
 
 
-def local(max_mem_usage: float = None, strategy: CacheStrategy = CacheStrategy.DYN):
-    return loc.LocalCache(target_usage=max_mem_usage, strategy=strategy)
+def remote(
+    address: rem.Address,
+    *,
+    serializer: Any = pickle,
+    near_size: int = rem._DEFAULT_NEAR_SIZE,
+    timeout: float = rem._DEFAULT_TIMEOUT,
+    max_mem_usage: float = None,
+    strategy: CacheStrategy = CacheStrategy.DYN,
+    secret: bytes = None,
+):
+    return rem.RemoteCache(
+        address,
+        serializer=serializer,
+        near_size=near_size,
+        timeout=timeout,
+        target_usage=max_mem_usage,
+        strategy=strategy,
+        secret=secret,
+    )
@@ -19,8 +19,13 @@ __all__ = (
     "shrink",
     "size",
     "memoize",
+    "memoize_method",
+    "cached_property",
+    "warm",
     "usage",
     "set_usage",
+    "set_max_size",
+    "set_strategy",
     "info",
 )
 
@@ -36,4 +41,9 @@ size = cache.size
 usage = cache.usage
 info = cache.info
 set_usage = cache.set_target_usage
+set_max_size = cache.set_max_size
+set_strategy = cache.set_strategy
 memoize = cache.memoize
+memoize_method = cache.memoize_method
+cached_property = cache.cached_property
+warm = cache.warm
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
 import collections
+import functools
 import threading
 from typing import Callable
 
@@ -22,7 +23,8 @@ class LocalCache(protos.ProtoCache):
         self,
         *,
         target_usage: float = None,
-        strategy: protos.CacheStrategy = protos.CacheStrategy.DYN
+        strategy: protos.CacheStrategy = protos.CacheStrategy.DYN,
+        max_size: int = None
     ):
         self._lock = threading.RLock()
         with self._lock:
@@ -31,11 +33,19 @@ class LocalCache(protos.ProtoCache):
             )
             self._cache = dict()
             self._locks = collections.defaultdict(threading.RLock)
+            self._local = threading.local()
+            self._read_buffers = []
+            self._forgotten = collections.deque()
             self._hits = 0
             self._misses = 0
             self.strategy = strategy
+            self.max_size = max_size
 
     __getitem__ = protos.cache_getitem
+    __setitem__ = protos.cache_setitem
+    __delitem__ = protos.cache_delitem
+    __iter__ = protos.cache_iter
+    __len__ = protos.cache_len
     get = protos.cache_get
     keys = protos.cache_keys
     values = protos.cache_values
@@ -45,12 +55,30 @@ class LocalCache(protos.ProtoCache):
     size = protos.cache_size
     usage = protos.memory_usage_ratio
     memoize = protos.memoize
+    memoize_method = protos.memoize_method
+    cached_property = protos.cached_property
+    warm = protos.warm
     set_target_usage = protos.set_target_memory_use_ratio
+    set_max_size = protos.set_max_size
+    set_strategy = protos.set_strategy
     # Assigned on init.
     shrink = protos.shrink
 
 
 def memoize(
+    _func: Callable = None,
+    *,
+    target_usage: float = LocalCache.TARGET_RATIO,
+    strategy: protos.CacheStrategy = protos.CacheStrategy.DYN,
+    stream_limit: int = protos._DEFAULT_STREAM_LIMIT
+) -> Callable:
+    cache = LocalCache(target_usage=target_usage, strategy=strategy)
+    memo = functools.partial(cache.memoize, stream_limit=stream_limit)
+
+    return memo(_func) if _func else memo
+
+
+def memoize_method(
     _func: Callable = None,
     *,
     target_usage: float = LocalCache.TARGET_RATIO,
@@ -58,4 +86,15 @@ def memoize(
 ) -> Callable:
     cache = LocalCache(target_usage=target_usage, strategy=strategy)
 
-    return cache.memoize(_func) if _func else cache.memoize
+    return cache.memoize_method(_func) if _func else cache.memoize_method
+
+
+def cached_property(
+    _func: Callable = None,
+    *,
+    target_usage: float = LocalCache.TARGET_RATIO,
+    strategy: protos.CacheStrategy = protos.CacheStrategy.DYN
+) -> property:
+    cache = LocalCache(target_usage=target_usage, strategy=strategy)
+
+    return cache.cached_property(_func) if _func else cache.cached_property
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import dataclasses
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+__all__ = ("FunctionProfile", "Profiler", "profile")
+
+
+@dataclasses.dataclass
+class FunctionProfile:
+    """Statistics gathered for a single memoized function while profiling.
+
+    All timings are in seconds.
+    """
+
+    func: Callable
+    cache: Any
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    overhead: float = 0.0  # doc: Time spent in reckon, rather than in the function.
+    compute: float = 0.0  # doc: Time spent calling the function on a miss.
+    saved: float = 0.0  # doc: Compute time avoided by returning a cached result.
+
+    @property
+    def name(self) -> str:
+        return f"{self.func.__module__}.{self.func.__qualname__}"
+
+    @property
+    def calls(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.calls if self.calls else 0.0
+
+    @property
+    def size(self) -> int:
+        """The number of bytes currently held in the cache for this function."""
+        entries = list(self.cache._cache.values())
+        return sum(x.size for x in entries if x.func is self.func)
+
+    @property
+    def net(self) -> float:
+        """The net time saved by caching this function."""
+        return self.saved - self.overhead
+
+    @property
+    def worthwhile(self) -> bool:
+        return self.net > 0
+
+
+class Profiler:
+    """Measure what memoization actually costs and saves, per function.
+
+    Profiling is off by default and costs a single attribute lookup per call when
+    disabled. It may be toggled with :py:meth:`enable` and :py:meth:`disable` or
+    used as a context manager::
+
+        with reckon.profile:
+            run_my_workload()
+        print(reckon.profile.format_report())
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.RLock()
+        self._stats: Dict[Callable, FunctionProfile] = {}
+
+    def __enter__(self) -> "Profiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _get(self, func: Callable, cache: Any) -> FunctionProfile:
+        stats = self._stats.get(func)
+        if stats is None:
+            stats = self._stats[func] = FunctionProfile(func=func, cache=cache)
+        return stats
+
+    def call(
+        self,
+        func: Callable,
+        cache: Any,
+        lookup: Callable[[Tuple, Dict], Tuple[Any, bool, float]],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        """Run a lookup in `cache` for `func` and record how long it took.
+
+        `lookup` must return the result, whether it was a hit, and the time the
+        function took (or originally took, for a hit) to compute the result, as
+        measured by :py:func:`time.perf_counter`.
+        """
+        start = perf_counter()
+        result, hit, duration = lookup(args, kwargs)
+        elapsed = perf_counter() - start
+        with self._lock:
+            stats = self._get(func, cache)
+            if hit:
+                stats.hits += 1
+                stats.saved += duration
+                stats.overhead += elapsed
+            else:
+                stats.misses += 1
+                stats.compute += duration
+                stats.overhead += max(elapsed - duration, 0.0)
+        return result
+
+    def evicted(self, entry):
+        with self._lock:
+            if entry.func in self._stats:
+                self._stats[entry.func].evictions += 1
+
+    def report(self) -> List[FunctionProfile]:
+        """Get the profiled functions, ranked by net time saved."""
+        with self._lock:
+            stats = [*self._stats.values()]
+        return sorted(stats, key=lambda x: x.net, reverse=True)
+
+    def flagged(self) -> List[FunctionProfile]:
+        """Get the profiled functions for which caching costs more than it saves."""
+        return [x for x in self.report() if not x.worthwhile]
+
+    def format_report(self) -> str:
+        header = (
+            f"{'function':<40} {'calls':>8} {'hit%':>6} {'overhead':>10} "
+            f"{'compute':>10} {'saved':>10} {'net':>10} {'bytes':>10} {'evict':>6}"
+        )
+        lines = [header, "-" * len(header)]
+        for stats in self.report():
+            flag = "" if stats.worthwhile else "  !"
+            lines.append(
+                f"{stats.name[-40:]:<40} {stats.calls:>8} {stats.hit_ratio:>6.1%} "
+                f"{stats.overhead:>10.6f} {stats.compute:>10.6f} {stats.saved:>10.6f} "
+                f"{stats.net:>10.6f} {stats.size:>10} {stats.evictions:>6}{flag}"
+            )
+        return "\n".join(lines)
+
+
+profile = Profiler()
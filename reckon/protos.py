@@ -1,14 +1,17 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
 import abc
+import concurrent.futures
 import dataclasses
 import enum
 import functools
 import inspect
+import itertools
 import threading
+import weakref
 from collections import deque
 from gc import collect as gc_collect
-from time import time
+from time import perf_counter, time
 from typing import (
     Dict,
     Hashable,
@@ -21,13 +24,16 @@ from typing import (
     DefaultDict,
     NamedTuple,
     Iterable,
+    List,
     Deque,
     Iterator,
+    Mapping,
     MutableMapping
 )
 
 import psutil
 
+from .prof import profile as profiler
 from .util import size
 
 
@@ -42,6 +48,119 @@ class CacheStrategy(str, enum.Enum):
 
 
 _DEFAULT_TTL_SECS = 300
+_DEFAULT_STREAM_LIMIT = 1024
+_MIN_AGE = 1e-6
+
+
+class ReplayBuffer:
+    """A thread-safe, lazily-populated buffer over the output of a generator.
+
+    The underlying generator is only advanced when a consumer asks for an item which
+    hasn't been produced yet. Every item produced is kept, so later (or concurrent)
+    consumers replay what's already been produced and then continue the stream.
+
+    Once more than ``limit`` items have been produced, the stream is no longer cached:
+    the buffer is dropped, the consumer which crossed the limit takes over the live
+    generator, and any other consumer re-computes the stream from the start, skipping
+    the items it has already seen.
+
+    The time spent producing items is added to the `duration` of the `owner` entry,
+    if the buffer has one.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Iterator],
+        *,
+        limit: int = _DEFAULT_STREAM_LIMIT,
+        on_detach: Callable[["ReplayBuffer"], Any] = None,
+    ):
+        self.factory = factory
+        self.limit = limit
+        self.on_detach = on_detach
+        self.lock = threading.RLock()
+        self.exhausted = False
+        self.detached = False
+        self.owner: Optional[weakref.ref] = None
+        self._buffer = []
+        self._iterator = None
+
+    def __iter__(self) -> Iterator:
+        index = 0
+        while True:
+            try:
+                with self.lock:
+                    item, live = self._next(index)
+            except Exception:
+                self._notify()
+                raise
+            if item is _STOP:
+                break
+            if live is not None:
+                # Stop caching before handing over, the consumer may never resume.
+                self._notify()
+                yield item
+                yield from live
+                return
+            yield item
+            index += 1
+        if self.detached:
+            self._notify()
+        if not self.exhausted:
+            yield from itertools.islice(self.factory(), index, None)
+
+    def __sizeof__(self) -> int:
+        # Intentionally lock-free, a snapshot of the buffer is good enough.
+        return object.__sizeof__(self) + size(list(self._buffer))
+
+    def _next(self, index: int) -> Tuple[Any, Optional[Iterator]]:
+        if index < len(self._buffer):
+            return self._buffer[index], None
+        if self.exhausted or self.detached:
+            return _STOP, None
+        start = perf_counter()
+        try:
+            if self._iterator is None:
+                self._iterator = iter(self.factory())
+            item = next(self._iterator)
+        except StopIteration:
+            self.exhausted = True
+            self._iterator = None
+            return _STOP, None
+        except Exception:
+            self._detach()
+            raise
+        finally:
+            self._produced(perf_counter() - start)
+        if len(self._buffer) >= self.limit:
+            return item, self._detach()
+        self._buffer.append(item)
+        return item, None
+
+    def _detach(self) -> Optional[Iterator]:
+        live, self._iterator = self._iterator, None
+        self.detached = True
+        self._buffer = []
+        return live
+
+    def _produced(self, elapsed: float):
+        entry = self.owner() if self.owner else None
+        if entry is not None:
+            entry.duration += elapsed
+
+    def fresh(self) -> "ReplayBuffer":
+        """Get a new, empty buffer over the same stream."""
+        buffer = type(self)(self.factory, limit=self.limit, on_detach=self.on_detach)
+        buffer.owner = self.owner
+        return buffer
+
+    def _notify(self):
+        # Called outside of our lock to avoid lock-order inversion with the owning cache.
+        if self.detached and self.on_detach:
+            self.on_detach(self)
+
+
+_STOP = object()
 
 
 @functools.total_ordering
@@ -58,21 +177,32 @@ class CacheEntry:
     expiration: Optional[int] = None
     lock: threading.RLock = dataclasses.field(default_factory=threading.RLock)
     strategy: CacheStrategy = CacheStrategy.DYN
+    uses: int = 0
 
     def __post_init__(self):
         self._size = None
+        # The size counted towards the cache's running total, see `_track`.
+        self._accounted = 0
         with self.lock:
             self.last_used = time()
             self.ttl = None
-            if self.strategy == CacheStrategy.TTL and not self.expiration:
+            self.set_strategy(self.strategy)
+
+    def set_strategy(self, strategy: CacheStrategy):
+        """Score this entry by the given strategy from now on."""
+        with self.lock:
+            self.strategy = strategy
+            if strategy == CacheStrategy.TTL and not self.expiration:
                 self.expiration = _DEFAULT_TTL_SECS
-            self.update_ttl()
+                self.update_ttl()
+            elif self.ttl is None:
+                self.update_ttl()
             self._get_score = (
                 self._dynamic_score
-                if self.strategy == CacheStrategy.DYN
+                if strategy == CacheStrategy.DYN
                 else (
                     self._lru_score
-                    if self.strategy == CacheStrategy.LRU
+                    if strategy == CacheStrategy.LRU
                     else self._ttl_score
                 )
             )
@@ -96,7 +226,11 @@ class CacheEntry:
     def size(self):
         with self.lock:
             if self._size is None:
-                self._size = size(self.result)
+                result = self.result
+                # A stream which is still being consumed will keep growing.
+                if isinstance(result, ReplayBuffer) and not result.exhausted:
+                    return size(result)
+                self._size = size(result)
         return self._size
 
     @property
@@ -105,23 +239,26 @@ class CacheEntry:
             return time() - self.last_used
 
     def _dynamic_score(self) -> float:
-        """Return a score based on a factor of size, duration, and age.
+        """Return a score based on a factor of size, duration, age and uses.
 
-        The higher the value, the sooner it's evicted.
+        The lower the value, the sooner it's evicted.
         """
-        return (self.size * self.duration) / (self.age ** 2)
+        # An entry used within the clock's resolution has an age of 0.
+        age = max(self.age, _MIN_AGE)
+        return (self.size * self.duration * (1 + self.uses)) / (age ** 2)
 
     def _lru_score(self) -> float:
         """Return a score based on when this entry was last used.
 
-        The higher the value, the older it is.
+        The lower the value, the longer ago it was used, and the sooner it's evicted.
         """
-        return self.age
+        return self.last_used
 
     def _ttl_score(self) -> float:
         """Return a score based on time to live.
 
-        Positive values indicate the entry has expired, the higher the value the older the item.
+        The lower the value, the sooner it expires (it's negative once it has), and
+        the sooner it's evicted.
         """
         return self.ttl - time()
 
@@ -140,10 +277,27 @@ class CacheEntry:
 
     def refresh(self, now: float):
         if self.ttl and now > self.ttl:
-            self.result = self.func(*self.args, **self.kwargs)
+            if isinstance(self.result, ReplayBuffer):
+                self.result = self.result.fresh()
+            else:
+                self.result = self.func(*self.args, **self.kwargs)
             self._size = None
         self.update_ttl()
 
+    def touch(self) -> bool:
+        """Slide the TTL forward, if the result may be returned as-is.
+
+        This doesn't take the entry's lock, so it's safe to call on the hit path.
+        """
+        ttl = self.ttl
+        if ttl is None:
+            return True
+        now = time()
+        if now > ttl:
+            return False
+        self.ttl = now + self.expiration
+        return True
+
     @property
     def res(self) -> Any:
         with self.lock:
@@ -163,17 +317,70 @@ class CacheInfo(NamedTuple):
     misses: int
 
 
+class WarmReport(NamedTuple):
+    """The progress (or final result) of warming a cache. Times are in seconds."""
+
+    total: int  # doc: The number of arguments consumed so far.
+    computed: int
+    skipped: int  # doc: Already in the cache.
+    failed: int  # doc: Unhashable arguments, or the function raised an error.
+    size: int  # doc: Bytes added to the cache.
+    elapsed: float
+    compute: float  # doc: Total time spent computing, across all workers.
+    stopped: bool  # doc: Whether warming stopped early to stay within budget.
+
+
+_READ_BUFFER_SIZE = 64
+
+
+class ReadBuffer:
+    """A lossy, per-thread record of cache hits.
+
+    Hits are recorded here without taking the cache's lock, and are applied to the
+    entries in batches by :py:func:`drain_read_buffers`. If the buffer is full and
+    the cache is busy, the hit's recency is simply dropped.
+    """
+
+    __slots__ = ("entries", "hits", "owner")
+
+    def __init__(self):
+        self.entries: List[CacheEntry] = []
+        # Only ever written by the owning thread.
+        self.hits = 0
+        self.owner = weakref.ref(threading.current_thread())
+
+
 class ProtoCache(abc.ABC, MutableMapping):
     """An abstract class for implementing a thread-safe cache."""
 
     TARGET_RATIO = 90.0
+    # An optional budget, in bytes, for the entries in this cache.
+    max_size: Optional[int] = None
+    # A running total of the size of the entries, kept while there's a budget.
+    _bytes: Optional[int] = None
+    # An optional observer of cache accesses, see `reckon.tune`.
+    _sampler: Optional[Any] = None
     strategy: CacheStrategy
     _lock: threading.RLock
     _cache: Dict[Hashable, CacheEntry]
     _locks: DefaultDict[Hashable, threading.RLock]
-    _hits: int
+    _local: Optional[threading.local] = None
+    _read_buffers: List[ReadBuffer] = ()
+    # Entries of collected instances, see `memoize_method`.
+    _forgotten: Deque[CacheEntry] = ()
+    _base_hits: int = 0
     _misses: int
 
+    @property
+    def _hits(self) -> int:
+        # Hits counted under the lock, plus those counted lock-free by each thread.
+        return self._base_hits + sum(x.hits for x in [*self._read_buffers])
+
+    @_hits.setter
+    def _hits(self, value: int):
+        # Only for resetting the count: an increment would race with other threads.
+        self._base_hits = value - sum(x.hits for x in [*self._read_buffers])
+
     @abc.abstractmethod
     def __getitem__(self, key: Hashable) -> CacheEntry:
         pass
@@ -259,7 +466,29 @@ def cache_getitem(instance: CacheType, key: Hashable) -> CacheEntry:
 def cache_get(
     instance: CacheType, key: Hashable, default: CacheEntry = None
 ) -> Optional[CacheEntry]:
-    return instance._cache.get(key, default=default)
+    return instance._cache.get(key, default)
+
+
+def cache_setitem(instance: CacheType, key: Hashable, entry: CacheEntry):
+    with instance._lock:
+        replaced = instance._cache.get(key)
+        if replaced is not None:
+            _untrack(instance, replaced)
+        instance._cache[key] = entry
+        _track(instance, entry)
+
+
+def cache_delitem(instance: CacheType, key: Hashable):
+    with instance._lock:
+        _untrack(instance, instance._cache.pop(key))
+
+
+def cache_iter(instance: CacheType) -> Iterator[Hashable]:
+    return iter(instance._cache)
+
+
+def cache_len(instance: CacheType) -> int:
+    return len(instance._cache)
 
 
 def cache_size(instance: CacheType) -> int:
@@ -300,7 +529,10 @@ def shrink_dynamic_cache(instance: CacheType):
             cachepop = instance._cache.pop
             while entries and should_delete(mem_ratio):
                 entry = entriespop()
-                cachepop(entry.key)
+                if cachepop(entry.key, None) is entry:
+                    _untrack(instance, entry)
+                    if profiler.enabled:
+                        profiler.evicted(entry)
                 del entry
                 mem_ratio = _get_mem().percent
 
@@ -324,13 +556,147 @@ def shrink_ttl_cache(instance: CacheType):
         del entry
 
 
+def _track(instance: CacheType, entry: CacheEntry):
+    """Count an entry, or any change in its size, towards the cache's running total."""
+    if instance._bytes is not None:
+        size = entry.size
+        instance._bytes += size - entry._accounted
+        entry._accounted = size
+
+
+def _untrack(instance: CacheType, entry: CacheEntry):
+    """Remove an entry from the cache's running total."""
+    if instance._bytes is not None:
+        instance._bytes -= entry._accounted
+    entry._accounted = 0
+
+
+def _recount(instance: CacheType):
+    """Count every entry from scratch, and keep a running total from here on."""
+    with instance._lock:
+        instance._bytes = 0
+        for entry in instance._cache.values():
+            entry._accounted = 0
+            _track(instance, entry)
+
+
+def entries_size(instance: CacheType) -> int:
+    """The approximate size, in bytes, of all the results held in the cache."""
+    if instance._bytes is not None:
+        return instance._bytes
+    return sum(x.size for x in list(instance._cache.values()))
+
+
+# Evict a little more than we need to, so a full cache isn't sorted on every miss.
+_EVICTION_WATERMARK = 0.95
+
+
+def shrink_to_max_size(instance: CacheType):
+    """Evict entries until the cache is within its `max_size` budget, if it has one."""
+    max_size = instance.max_size
+    if max_size is None:
+        return
+
+    with instance._lock:
+        if instance._bytes is None:
+            _recount(instance)
+        if instance._bytes <= max_size:
+            return
+        # Make sure eviction is based upon the latest recency.
+        drain_read_buffers(instance)
+        target = max_size * _EVICTION_WATERMARK
+        # Sorted by score, so the first to go come first.
+        entries = instance.values()
+        entriespop = entries.popleft
+        cachepop = instance._cache.pop
+        while entries and instance._bytes > target:
+            entry = entriespop()
+            if cachepop(entry.key, None) is entry:
+                _untrack(instance, entry)
+                if profiler.enabled:
+                    profiler.evicted(entry)
+            del entry
+
+
+def remove_forgotten(instance: CacheType):
+    """Remove the entries of collected instances, which may only be done under lock."""
+    forgotten = instance._forgotten
+    if not forgotten:
+        return
+
+    with instance._lock:
+        while forgotten:
+            entry = forgotten.popleft()
+            if instance._cache.get(entry.key) is entry:
+                del instance._cache[entry.key]
+                _untrack(instance, entry)
+
+
+def drain_read_buffers(instance: CacheType):
+    """Apply the hits recorded lock-free by each thread to their entries."""
+    remove_forgotten(instance)
+    if not instance._read_buffers:
+        return
+
+    with instance._lock:
+        now = time()
+        sampler = instance._sampler
+        tracked = instance._bytes is not None
+        # Other threads may register new buffers while we drain.
+        for buffer in [*instance._read_buffers]:
+            entries, buffer.entries = buffer.entries, []
+            for entry in entries:
+                entry.last_used = now
+                entry.uses += 1
+                # Sampling may be slow, so it's done here rather than on each hit.
+                if sampler is not None:
+                    sampler.record(entry.key, entry)
+                # A stream grows as it's replayed.
+                if tracked and instance._cache.get(entry.key) is entry:
+                    _track(instance, entry)
+            owner = buffer.owner()
+            if owner is None or not owner.is_alive():
+                instance._base_hits += buffer.hits
+                instance._read_buffers.remove(buffer)
+
+
+def _read_buffer(instance: CacheType) -> ReadBuffer:
+    try:
+        return instance._local.buffer
+    except AttributeError:
+        buffer = instance._local.buffer = ReadBuffer()
+        # Appending to a list is atomic, so this doesn't need the lock either.
+        instance._read_buffers.append(buffer)
+        return buffer
+
+
+def record_hit(instance: CacheType, entry: CacheEntry):
+    """Record a cache hit without blocking.
+
+    The hit is added to this thread's read buffer. If the buffer is full, we drain
+    all the buffers, but only if nobody else holds the cache lock.
+    """
+    buffer = _read_buffer(instance)
+    buffer.hits += 1
+    if len(buffer.entries) >= _READ_BUFFER_SIZE:
+        if not instance._lock.acquire(blocking=False):
+            return
+        try:
+            drain_read_buffers(instance)
+        finally:
+            instance._lock.release()
+    buffer.entries.append(entry)
+
+
 def shrink(instance: CacheType):
+    drain_read_buffers(instance)
     if instance.strategy == CacheStrategy.DYN:
         shrink_dynamic_cache(instance)
     elif instance.strategy == CacheStrategy.TTL:
         shrink_ttl_cache(instance)
     else:
         shrink_lru_cache(instance)
+    shrink_to_max_size(instance)
 
 
 _get_mem = psutil.virtual_memory
@@ -353,6 +719,13 @@ def clear_cache(instance: CacheType):
     with instance._lock:
         # Localizing variables for faster access in the while loop.
         instance._cache.clear()
+        # Don't let recorded hits or collected instances keep old entries alive.
+        for buffer in [*instance._read_buffers]:
+            buffer.entries = []
+        if instance._forgotten:
+            instance._forgotten.clear()
+        if instance._bytes is not None:
+            instance._bytes = 0
         instance._misses = 0
         instance._hits = 0
         gc_collect()
@@ -367,6 +740,28 @@ def set_target_memory_use_ratio(instance: CacheType, ratio: float):
         instance.target_memory_use_ratio = ratio
 
 
+def set_strategy(instance: CacheType, strategy: CacheStrategy):
+    """Switch the caching strategy, re-scoring the existing entries to match."""
+    with instance._lock:
+        instance.strategy = strategy
+        for entry in instance._cache.values():
+            entry.set_strategy(strategy)
+
+
+def set_max_size(instance: CacheType, max_size: Optional[int]):
+    """Set the budget, in bytes, for the entries in this cache.
+
+    ``None`` removes the budget, leaving only the target memory usage ratio.
+    """
+    with instance._lock:
+        instance.max_size = max_size
+        if max_size is None:
+            instance._bytes = None
+        else:
+            _recount(instance)
+    shrink_to_max_size(instance)
+
+
 def _create_entry(
     func: Callable,
     key: int,
@@ -374,11 +769,15 @@ def _create_entry(
     kwargs: Dict[str, Any],
     *,
     expiration: int = None,
-    strategy: CacheStrategy = CacheStrategy.DYN
+    strategy: CacheStrategy = CacheStrategy.DYN,
+    stream: Callable[[Callable[[], Iterator]], ReplayBuffer] = None
 ) -> CacheEntry:
-    start = time()
-    result = func(*args, **kwargs)
-    end = time()
+    start = perf_counter()
+    if stream:
+        result = stream(functools.partial(func, *args, **kwargs))
+    else:
+        result = func(*args, **kwargs)
+    end = perf_counter()
     duration = end - start
 
     entry = CacheEntry(
@@ -391,10 +790,38 @@ def _create_entry(
         kwargs=kwargs,
         strategy=strategy,
     )
+    if stream:
+        # The cost of a stream is the time spent producing its items.
+        result.owner = weakref.ref(entry)
     return entry
 
 
-def memoize(instance: CacheType, func: Callable, *, expiration: int = None) -> Callable:
+def _make_key(
+    func: Callable,
+    args: Tuple,
+    kwargs: Dict[str, Any],
+    sig: inspect.Signature = None,
+) -> int:
+    bound = (sig or inspect.signature(func)).bind(*args, **kwargs)
+    return hash(frozenset(set(bound.arguments.items()) | {func}))
+
+
+def _evict_stream(instance: CacheType, key: Hashable, buffer: ReplayBuffer):
+    """Remove a stream which is no longer being cached, if it's still in the cache."""
+    with instance._lock:
+        entry = instance._cache.get(key)
+        if entry is not None and entry.result is buffer:
+            del instance._cache[key]
+            _untrack(instance, entry)
+
+
+def memoize(
+    instance: CacheType,
+    func: Callable,
+    *,
+    expiration: int = None,
+    stream_limit: int = _DEFAULT_STREAM_LIMIT
+) -> Callable:
     """Maintain a dynamically sized cache for memoized function calls.
 
     Return cached results if possible.
@@ -404,28 +831,53 @@ def memoize(instance: CacheType, func: Callable, *, expiration: int = None) -> C
         - Longer execution times are ranked lower,
         - Entries are evicted from highest to lowest ranking.
 
+    Generator functions are cached lazily: items are buffered as they are consumed
+    and replayed to any later callers. Streams longer than `stream_limit` items are
+    not cached.
+
+    Cache hits don't take any locks. Their recency is recorded in a per-thread
+    buffer, which is applied to the entries in batches before the cache is shrunk.
+
     You probably should use the memoized decorator instead of calling this
     directly.
     """
     func.cache = instance
+    is_stream = inspect.isgeneratorfunction(func)
+    sig = inspect.signature(func)
+
+    def _lookup(args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Any, bool, float]:
+        try:
+            key = _make_key(func, args, kwargs, sig)
+        # received an unhashable input, can't cache this.
+        except TypeError:
+            with instance._lock:
+                instance._misses += 1
+            start = perf_counter()
+            result = func(*args, **kwargs)
+            return result, False, perf_counter() - start
 
-    @functools.wraps(func)
-    def _memoized(*args, **kwargs) -> Any:
+        # Hits don't take any locks: reading from a dict is atomic.
+        entry = instance._cache.get(key)
+        if entry is not None and entry.touch():
+            record_hit(instance, entry)
+            result = entry.result
+            return (iter(result) if is_stream else result), True, entry.duration
 
         with instance._lock:
-            try:
-                sig = inspect.signature(func)
-                bound = sig.bind(*args, **kwargs)
-                key = hash(frozenset(set(bound.arguments.items()) | {func}))
-            # received an unhashable input, can't cache this.
-            except TypeError:
-                instance._misses += 1
-                return func(*args, **kwargs)
-
-            if key in instance._cache:
-                result = instance._cache[key].res
-                instance._hits += 1
+            entry = instance._cache.get(key)
+            hit = entry is not None
+            if hit:
+                instance._base_hits += 1
             else:
+                stream = (
+                    functools.partial(
+                        ReplayBuffer,
+                        limit=stream_limit,
+                        on_detach=functools.partial(_evict_stream, instance, key),
+                    )
+                    if is_stream
+                    else None
+                )
                 entry = _create_entry(
                     func=func,
                     key=key,
@@ -433,12 +885,364 @@ def memoize(instance: CacheType, func: Callable, *, expiration: int = None) -> C
                     kwargs=kwargs,
                     expiration=expiration,
                     strategy=instance.strategy,
+                    stream=stream,
                 )
                 instance._cache[key] = entry
-                result = entry.res
                 instance._misses += 1
+            result = entry.res
+            _track(instance, entry)
+            # Shrinking drains the read buffers, so accesses are sampled in order.
             instance.shrink()
+            if instance._sampler is not None:
+                instance._sampler.record(key, entry)
+
+            return (iter(result) if is_stream else result), hit, entry.duration
 
-            return result
+    @functools.wraps(func)
+    def _memoized(*args, **kwargs) -> Any:
+        if profiler.enabled:
+            return profiler.call(func, instance, _lookup, args, kwargs)
+        return _lookup(args, kwargs)[0]
 
+    _memoized.expiration = expiration
     return _memoized
+
+
+def _forget(
+    instance: CacheType,
+    tables: Dict[int, Tuple[weakref.ref, set]],
+    oid: int,
+    ref: weakref.ref,
+):
+    """Queue the entries of a collected instance for removal.
+
+    Called by the garbage collector, at any point in any thread, so the cache may be
+    mid-iteration. The entries are removed by :py:func:`remove_forgotten`, under
+    the lock. Appending to a deque and popping from a dict are atomic.
+    """
+    table = tables.get(oid)
+    if table is None or table[0] is not ref:
+        return
+    tables.pop(oid, None)
+    for key in table[1]:
+        entry = instance._cache.get(key)
+        if entry is not None:
+            instance._forgotten.append(entry)
+
+
+def memoize_method(
+    instance: CacheType, func: Callable, *, expiration: int = None
+) -> Callable:
+    """Memoize a method per-instance, without hashing or retaining the instance.
+
+    Entries are keyed by the identity of the instance rather than its hash, so
+    unhashable instances may be cached. Entries only hold a weak reference to the
+    instance. Once the instance is collected, its entries are removed the next time
+    the cache is shrunk or the method is called.
+    Instances which can't be weakly referenced (e.g. with ``__slots__`` but no
+    ``__weakref__``) are not cached.
+
+    Entries live in the owning cache, so they count towards its memory usage and
+    are evicted alongside every other entry.
+    """
+    if inspect.isgeneratorfunction(func):
+        raise TypeError(
+            f"Can't memoize generator method {func.__qualname__!r} per-instance, "
+            "use `memoize` instead."
+        )
+    func.cache = instance
+    # id(instance) -> (weakref(instance), {cache keys for that instance})
+    tables: Dict[int, Tuple[weakref.ref, set]] = {}
+
+    def _table(obj: Any) -> set:
+        oid = id(obj)
+        table = tables.get(oid)
+        if table is None or table[0]() is not obj:
+            table = tables[oid] = (
+                weakref.ref(obj, functools.partial(_forget, instance, tables, oid)),
+                set(),
+            )
+        return table[1]
+
+    sig = inspect.signature(func)
+
+    def _lookup(args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Any, bool, float]:
+        obj, *rest = args
+        try:
+            bound = sig.bind(*args, **kwargs)
+            arguments = [*bound.arguments.items()][1:]
+            key = hash((id(obj), frozenset(set(arguments) | {func})))
+        # received an unhashable input.
+        except TypeError:
+            key = None
+        else:
+            # Hits don't take any locks: reading from a dict is atomic. The entries
+            # of a collected instance with the same id may not be removed yet, but
+            # its table is.
+            table = tables.get(id(obj))
+            entry = instance._cache.get(key)
+            if (
+                entry is not None
+                and table is not None
+                and table[0]() is obj
+                and entry.touch()
+            ):
+                record_hit(instance, entry)
+                return entry.result, True, entry.duration
+
+        with instance._lock:
+            remove_forgotten(instance)
+            try:
+                keys = _table(obj) if key is not None else None
+            # received an un-referenceable instance.
+            except TypeError:
+                keys = None
+
+            if keys is not None:
+                entry = instance._cache.get(key)
+                hit = entry is not None
+                if hit:
+                    instance._base_hits += 1
+                else:
+                    entry = _create_entry(
+                        func=func,
+                        key=key,
+                        args=args,
+                        kwargs=kwargs,
+                        expiration=expiration,
+                        strategy=instance.strategy,
+                    )
+                    # Only refer to the instance weakly once it's in the cache.
+                    entry.args = (weakref.proxy(obj), *rest)
+                    instance._cache[key] = entry
+                    keys.add(key)
+                    instance._misses += 1
+                result = entry.res
+                _track(instance, entry)
+                instance.shrink()
+                if instance._sampler is not None:
+                    instance._sampler.record(key, entry)
+
+                return result, hit, entry.duration
+
+            instance._misses += 1
+
+        start = perf_counter()
+        result = func(*args, **kwargs)
+        return result, False, perf_counter() - start
+
+    @functools.wraps(func)
+    def _memoized(*args, **kwargs) -> Any:
+        if profiler.enabled:
+            return profiler.call(func, instance, _lookup, args, kwargs)
+        return _lookup(args, kwargs)[0]
+
+    return _memoized
+
+
+def cached_property(
+    instance: CacheType, func: Callable, *, expiration: int = None
+) -> property:
+    """A property which is memoized per-instance, see :py:func:`memoize_method`."""
+    return property(memoize_method(instance, func, expiration=expiration))
+
+
+_DEFAULT_WARM_WORKERS = 4
+
+
+def _timed(func: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+    start = perf_counter()
+    result = func(*args, **kwargs)
+    return result, perf_counter() - start
+
+
+def _warm_args(item: Any) -> Tuple[Tuple, Dict[str, Any]]:
+    if isinstance(item, tuple):
+        return item, {}
+    if isinstance(item, Mapping):
+        return (), dict(item)
+    return (item,), {}
+
+
+class _Warmer:
+    """The state of a single call to :py:func:`warm`."""
+
+    def __init__(
+        self,
+        instance: CacheType,
+        func: Callable,
+        *,
+        workers: int,
+        budget: Optional[int],
+        processes: bool,
+        progress: Optional[Callable[[WarmReport], Any]],
+    ):
+        original = getattr(func, "__wrapped__", func)
+        if inspect.isgeneratorfunction(original):
+            raise TypeError(f"Can't warm generator function {original.__qualname__!r}.")
+        if getattr(func, "cache", instance) is not instance:
+            raise ValueError(
+                f"{original.__qualname__!r} is memoized by another cache, "
+                "warm it with `func.cache.warm` instead."
+            )
+        self.instance = instance
+        self.original = original
+        self.target = func if processes else original
+        # Entries should expire just as they would had the wrapper created them.
+        self.expiration = (
+            getattr(func, "expiration", None) if func is not original else None
+        )
+        self.workers = workers
+        self.budget = budget
+        self.processes = processes
+        self.progress = progress
+        self.stats = dict(total=0, computed=0, skipped=0, failed=0, size=0, compute=0.0)
+        self.start = perf_counter()
+        self.current = entries_size(instance)
+        self.stopped = False
+        self.pending: Dict[concurrent.futures.Future, Tuple[int, Tuple, Dict]] = {}
+
+    def report(self) -> WarmReport:
+        return WarmReport(
+            **self.stats, elapsed=perf_counter() - self.start, stopped=self.stopped
+        )
+
+    def over_budget(self, added: int) -> bool:
+        instance = self.instance
+        if self.budget is not None and self.stats["size"] + added > self.budget:
+            return True
+        if instance.max_size is not None and self.current + added > instance.max_size:
+            return True
+        return _get_mem().percent > instance.TARGET_RATIO
+
+    def handled(self, **counts):
+        for name, count in counts.items():
+            self.stats[name] += count
+        if self.progress:
+            self.progress(self.report())
+
+    def add(
+        self,
+        key: int,
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        future: concurrent.futures.Future,
+    ) -> bool:
+        """Add a computed result to the cache, unless it's over budget."""
+        instance = self.instance
+        try:
+            result, duration = future.result()
+        except Exception:
+            self.handled(failed=1)
+            return True
+        entry = CacheEntry(
+            func=self.original,
+            key=key,
+            duration=duration,
+            result=result,
+            args=args,
+            kwargs=kwargs,
+            expiration=self.expiration,
+            strategy=instance.strategy,
+        )
+        with instance._lock:
+            exists = key in instance._cache
+            if not exists:
+                if self.over_budget(entry.size):
+                    return False
+                instance._cache[key] = entry
+                _track(instance, entry)
+                self.current += entry.size
+        if exists:
+            self.handled(skipped=1, compute=duration)
+        else:
+            self.handled(computed=1, size=entry.size, compute=duration)
+        return True
+
+    def submit(self, executor: concurrent.futures.Executor, items: Iterator):
+        """Keep the workers busy with arguments which aren't cached yet."""
+        while not self.stopped and len(self.pending) < self.workers * 2:
+            item = next(items, _STOP)
+            if item is _STOP:
+                return
+            self.stats["total"] += 1
+            args, kwargs = _warm_args(item)
+            try:
+                key = _make_key(self.original, args, kwargs)
+            except TypeError:
+                self.handled(failed=1)
+                continue
+            if key in self.instance._cache:
+                self.handled(skipped=1)
+                continue
+            if self.over_budget(0):
+                self.stopped = True
+                return
+            future = executor.submit(_timed, self.target, args, kwargs)
+            self.pending[future] = (key, args, kwargs)
+
+    def collect(self):
+        """Wait for at least one result, and add any which are done."""
+        done, _ = concurrent.futures.wait(
+            self.pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in done:
+            key, args, kwargs = self.pending.pop(future)
+            if not self.stopped and not self.add(key, args, kwargs, future):
+                self.stopped = True
+
+    def run(self, arg_iterable: Iterable[Any]) -> WarmReport:
+        executor_cls = (
+            concurrent.futures.ProcessPoolExecutor
+            if self.processes
+            else concurrent.futures.ThreadPoolExecutor
+        )
+        with executor_cls(max_workers=self.workers) as executor:
+            items = iter(arg_iterable)
+            while True:
+                self.submit(executor, items)
+                if not self.pending:
+                    break
+                self.collect()
+                if self.stopped:
+                    for future in self.pending:
+                        future.cancel()
+                    self.pending.clear()
+                    break
+
+        return self.report()
+
+
+def warm(
+    instance: CacheType,
+    func: Callable,
+    arg_iterable: Iterable[Any],
+    *,
+    workers: int = _DEFAULT_WARM_WORKERS,
+    budget: int = None,
+    processes: bool = False,
+    progress: Callable[[WarmReport], Any] = None,
+) -> WarmReport:
+    """Pre-compute the results of a memoized function, concurrently.
+
+    Each item of `arg_iterable` is either a tuple of positional arguments, a mapping
+    of keyword arguments, or a single positional argument. Arguments which are
+    already cached are skipped, the rest are computed on a pool of `workers` threads
+    (or processes, if `processes` is set, in which case `func` must be picklable).
+
+    Warming stops as soon as adding another result would trigger eviction - either
+    by exceeding the cache's `max_size`, or by pushing memory usage over its target
+    ratio - or would add more than `budget` bytes to the cache.
+
+    `progress`, if given, is called with a :py:class:`WarmReport` as each item is
+    handled. The final report is returned.
+    """
+    warmer = _Warmer(
+        instance,
+        func,
+        workers=workers,
+        budget=budget,
+        processes=processes,
+        progress=progress,
+    )
+    return warmer.run(arg_iterable)
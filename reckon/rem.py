@@ -0,0 +1,636 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""A network cache, shared by many processes (or hosts) via a bundled cache server.
+
+The wire protocol is deliberately simple. Every message is a frame::
+
+    <length: uint32> <tag: 1 byte> (<field length: uint32> <field bytes>)*
+
+A field length of ``0xFFFFFFFF`` denotes a missing value. Requests are tagged with
+the operation (``G``et, ``S``et, ``D``elete, ``C``lear, ``I``nfo) and responses
+with their status (``+`` or ``-``). Responses are sent in the order the requests
+were received, so a client may pipeline many requests over a single connection.
+"""
+import argparse
+import collections
+import functools
+import hashlib
+import hmac
+import inspect
+import os
+import pickle
+import queue
+import socket
+import socketserver
+import struct
+import threading
+from time import perf_counter, time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from . import protos
+from .prof import profile as profiler
+
+__all__ = ("CacheClient", "CacheServer", "RemoteCache", "RemoteError")
+
+
+Address = Union[str, Tuple[str, int]]
+
+_LEN = struct.Struct("!I")
+_MISSING = 0xFFFFFFFF
+_OK = b"+"
+_ERR = b"-"
+_GET = b"G"
+_SET = b"S"
+_DEL = b"D"
+_CLEAR = b"C"
+_INFO = b"I"
+
+_DEFAULT_TIMEOUT = 0.1
+_DEFAULT_POOL_SIZE = 4
+_DEFAULT_BATCH_SIZE = 512
+_DEFAULT_NEAR_SIZE = 1024
+
+
+class RemoteError(Exception):
+    """The cache server could not handle a request."""
+
+
+def _encode(tag: bytes, fields: Iterable[Optional[bytes]] = ()) -> bytes:
+    body = [tag]
+    for field in fields:
+        if field is None:
+            body.append(_LEN.pack(_MISSING))
+        else:
+            body.append(_LEN.pack(len(field)))
+            body.append(field)
+    body = b"".join(body)
+    return _LEN.pack(len(body)) + body
+
+
+def _decode(frame: bytes) -> Tuple[bytes, List[Optional[bytes]]]:
+    tag, fields, pos, end = frame[:1], [], 1, len(frame)
+    while pos < end:
+        (length,) = _LEN.unpack_from(frame, pos)
+        pos += _LEN.size
+        if length == _MISSING:
+            fields.append(None)
+        else:
+            fields.append(frame[pos : pos + length])
+            pos += length
+    return tag, fields
+
+
+def _read_frame(stream) -> Optional[bytes]:
+    header = stream.read(_LEN.size)
+    if not header:
+        return None
+    if len(header) < _LEN.size:
+        raise ConnectionError("Connection closed mid-frame.")
+    (length,) = _LEN.unpack(header)
+    body = stream.read(length)
+    if len(body) < length:
+        raise ConnectionError("Connection closed mid-frame.")
+    return body
+
+
+def _chunks(seq: List, size: int) -> Iterable[List]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        store: "CacheServer" = self.server.store
+        while True:
+            try:
+                frame = _read_frame(self.rfile)
+            except ConnectionError:
+                return
+            if frame is None:
+                return
+            try:
+                response = _encode(_OK, store.handle(*_decode(frame)))
+            except Exception as err:
+                response = _encode(_ERR, (repr(err).encode(),))
+            self.wfile.write(response)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+else:  # pragma: nocover
+    _UnixServer = None
+
+
+class CacheServer:
+    """A simple, threaded cache server.
+
+    Values are opaque bytes; the server never deserializes them. If `max_size` is
+    given, least-recently-used values are evicted once the stored bytes exceed it.
+
+    Pass a path as the `address` to listen on a Unix socket, or a ``(host, port)``
+    tuple to listen over TCP (port ``0`` picks a free port).
+    """
+
+    def __init__(self, address: Address, *, max_size: int = None):
+        self.max_size = max_size
+        self._store: Dict[bytes, bytes] = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        server_cls = _UnixServer if isinstance(address, str) else _TCPServer
+        self._server = server_cls(address, _Handler)
+        self._server.store = self
+        self.address: Address = self._server.server_address
+
+    def __enter__(self) -> "CacheServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        self._server.serve_forever(poll_interval)
+
+    def start(self, poll_interval: float = 0.1) -> "CacheServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(poll_interval,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def handle(self, op: bytes, fields: List[Optional[bytes]]) -> List[Optional[bytes]]:
+        with self._lock:
+            store = self._store
+            if op == _GET:
+                values = []
+                for key in fields:
+                    value = store.get(key)
+                    if value is not None:
+                        store.move_to_end(key)
+                    values.append(value)
+                return values
+            if op == _SET:
+                for key, value in zip(fields[::2], fields[1::2]):
+                    self._bytes += len(value) - len(store.pop(key, b""))
+                    store[key] = value
+                self._shrink()
+                return []
+            if op == _DEL:
+                for key in fields:
+                    self._bytes -= len(store.pop(key, b""))
+                return []
+            if op == _CLEAR:
+                store.clear()
+                self._bytes = 0
+                return []
+            if op == _INFO:
+                return [str(len(store)).encode(), str(self._bytes).encode()]
+        raise RemoteError(f"Unknown operation: {op!r}")
+
+    def _shrink(self):
+        if self.max_size is None:
+            return
+        while self._store and self._bytes > self.max_size:
+            _, value = self._store.popitem(last=False)
+            self._bytes -= len(value)
+
+
+class _Connection:
+    def __init__(self, address: Address, timeout: float):
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(address)
+        except OSError:
+            self.sock.close()
+            raise
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.sock.makefile("rb")
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+class CacheClient:
+    """A client for :py:class:`CacheServer` with a bounded connection pool.
+
+    Multi-key operations are split into batches of `batch_size` keys, and all of the
+    batches are pipelined over a single connection.
+
+    Any operation which takes longer than `timeout` seconds raises
+    :py:class:`socket.timeout`. The connection it was using is discarded.
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        *,
+        pool_size: int = _DEFAULT_POOL_SIZE,
+        timeout: float = _DEFAULT_TIMEOUT,
+        batch_size: int = _DEFAULT_BATCH_SIZE,
+    ):
+        self.address = address
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _acquire(self) -> _Connection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise socket.timeout("Timed out waiting for a pooled connection.")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return _Connection(self.address, self.timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: _Connection, healthy: bool):
+        if healthy:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def pipeline(
+        self, requests: Iterable[Tuple[bytes, Iterable[Optional[bytes]]]]
+    ) -> List[List[Optional[bytes]]]:
+        """Send many requests at once, then read all of their responses in order."""
+        frames = [_encode(op, fields) for op, fields in requests]
+        if not frames:
+            return []
+        conn = self._acquire()
+        healthy = False
+        try:
+            conn.sock.sendall(b"".join(frames))
+            responses = []
+            for _ in frames:
+                frame = _read_frame(conn.rfile)
+                if frame is None:
+                    raise ConnectionError("Connection closed by the cache server.")
+                responses.append(_decode(frame))
+            healthy = True
+        finally:
+            self._release(conn, healthy)
+        for status, fields in responses:
+            if status != _OK:
+                raise RemoteError(fields[0].decode() if fields else "Unknown error.")
+        return [fields for _, fields in responses]
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, bytes]:
+        """Get all of the values which are present for the given keys."""
+        keys = [*keys]
+        batches = [*_chunks(keys, self.batch_size)]
+        responses = self.pipeline((_GET, batch) for batch in batches)
+        found = {}
+        for batch, values in zip(batches, responses):
+            found.update((k, v) for k, v in zip(batch, values) if v is not None)
+        return found
+
+    def set(self, key: bytes, value: bytes):
+        self.set_many({key: value})
+
+    def set_many(self, mapping: Mapping[bytes, bytes]):
+        items = [*mapping.items()]
+        self.pipeline(
+            (_SET, [x for item in batch for x in item])
+            for batch in _chunks(items, self.batch_size)
+        )
+
+    def delete(self, key: bytes):
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[bytes]):
+        self.pipeline((_DEL, batch) for batch in _chunks([*keys], self.batch_size))
+
+    def clear(self):
+        self.pipeline([(_CLEAR, ())])
+
+    def info(self) -> Dict[str, int]:
+        (fields,) = self.pipeline([(_INFO, ())])
+        return {"entries": int(fields[0]), "size": int(fields[1])}
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_REMOTE_ERRORS = (OSError, RemoteError)
+_MAC_SIZE = hashlib.sha256().digest_size
+
+
+def _canonical(value: Any, dumps: Callable[[Any], bytes]) -> Any:
+    """Order the members of any sets or dicts in `value` by their serialized form.
+
+    Iteration order of a set depends upon the hash seed, which differs between
+    processes, so it would otherwise leak into the serialized key.
+    """
+    if isinstance(value, (set, frozenset)):
+        members = (_canonical(x, dumps) for x in value)
+        return type(value).__name__, tuple(sorted(members, key=dumps))
+    if isinstance(value, dict):
+        items = ((_canonical(k, dumps), _canonical(v, dumps)) for k, v in value.items())
+        return "dict", tuple(sorted(items, key=dumps))
+    if type(value) in (list, tuple):
+        return type(value)(_canonical(x, dumps) for x in value)
+    return value
+
+
+def _expired(entry: protos.CacheEntry) -> bool:
+    return entry.ttl is not None and time() > entry.ttl
+
+
+class RemoteCache(protos.ProtoCache):
+    """A cache shared between processes via a :py:class:`CacheServer`.
+
+    Results are serialized with `serializer` - any object with ``dumps`` and
+    ``loads`` functions, such as :py:mod:`pickle` (the default) - and stored
+    remotely. Recent hits are kept in a small, local near-cache of `near_size`
+    entries, which is what the ProtoCache API (keys, values, info, etc.) reflects.
+
+    If the server can't be reached within `timeout` seconds, the memoized function
+    is simply called.
+
+    The server doesn't authenticate its clients, so anyone who can reach it can
+    write to it. If `secret` is given, payloads are signed with it, and payloads
+    without a valid signature are ignored. Since unpickling runs arbitrary code,
+    pickling results over TCP requires a `secret`.
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        *,
+        serializer: Any = pickle,
+        near_size: int = _DEFAULT_NEAR_SIZE,
+        timeout: float = _DEFAULT_TIMEOUT,
+        pool_size: int = _DEFAULT_POOL_SIZE,
+        target_usage: float = None,
+        strategy: protos.CacheStrategy = protos.CacheStrategy.DYN,
+        secret: bytes = None,
+    ):
+        if secret is None and serializer is pickle and not isinstance(address, str):
+            raise ValueError(
+                "Results from a TCP cache server must be signed before they're "
+                "unpickled, pass a `secret` shared by all clients."
+            )
+        self._lock = threading.RLock()
+        with self._lock:
+            self.TARGET_RATIO = (
+                target_usage if target_usage is not None else self.TARGET_RATIO
+            )
+            self.client = CacheClient(address, pool_size=pool_size, timeout=timeout)
+            self.serializer = serializer
+            self.secret = secret
+            self.near_size = near_size
+            self._cache = collections.OrderedDict()
+            self._locks = collections.defaultdict(threading.RLock)
+            self._hits = 0
+            self._misses = 0
+            self.strategy = strategy
+
+    __getitem__ = protos.cache_getitem
+    __setitem__ = protos.cache_setitem
+    __delitem__ = protos.cache_delitem
+    __iter__ = protos.cache_iter
+    __len__ = protos.cache_len
+    get = protos.cache_get
+    keys = protos.cache_keys
+    values = protos.cache_values
+    items = protos.cache_items
+    info = protos.cache_info
+    size = protos.cache_size
+    usage = protos.memory_usage_ratio
+    set_target_usage = protos.set_target_memory_use_ratio
+
+    def shrink(self):
+        with self._lock:
+            while len(self._cache) > self.near_size:
+                _, entry = self._cache.popitem(last=False)
+                protos._untrack(self, entry)
+                if profiler.enabled:
+                    profiler.evicted(entry)
+            protos.shrink(self)
+
+    def clear(self):
+        """Clear the near-cache and, if it can be reached, the remote cache."""
+        protos.clear_cache(self)
+        try:
+            self.client.clear()
+        except _REMOTE_ERRORS:
+            pass
+
+    def remote_info(self) -> Dict[str, int]:
+        return self.client.info()
+
+    def _key(self, func: Callable, bound: inspect.BoundArguments) -> bytes:
+        # Must be stable across processes, so we can't rely upon `hash()`.
+        dumps = self.serializer.dumps
+        arguments = _canonical(tuple(bound.arguments.items()), dumps)
+        raw = dumps((func.__module__, func.__qualname__, arguments))
+        return hashlib.blake2b(raw, digest_size=16).digest()
+
+    def _sign(self, key: bytes, payload: bytes) -> bytes:
+        if self.secret is None:
+            return payload
+        # Sign the key too, so a payload can't be replayed under another key.
+        mac = hmac.new(self.secret, key + payload, hashlib.sha256).digest()
+        return mac + payload
+
+    def _verify(self, key: bytes, signed: bytes) -> Optional[bytes]:
+        if self.secret is None:
+            return signed
+        mac, payload = signed[:_MAC_SIZE], signed[_MAC_SIZE:]
+        expected = hmac.new(self.secret, key + payload, hashlib.sha256).digest()
+        return payload if hmac.compare_digest(mac, expected) else None
+
+    def _fetch(
+        self, key: bytes
+    ) -> Tuple[Optional[Tuple[float, Optional[float], Any]], bool]:
+        """Get an unexpired result from the server, and whether it was reachable."""
+        try:
+            payload = self.client.get(key)
+        except _REMOTE_ERRORS:
+            return None, False
+        if payload is not None:
+            payload = self._verify(key, payload)
+        if payload is None:
+            return None, True
+        try:
+            duration, expires, result = self.serializer.loads(payload)
+        # A corrupt payload, or one written by an incompatible version, is a miss.
+        except Exception:
+            return None, True
+        if expires is not None and time() > expires:
+            return None, True
+        return (duration, expires, result), True
+
+    def _push(self, entry: protos.CacheEntry, expires: Optional[float]):
+        try:
+            payload = self.serializer.dumps((entry.duration, expires, entry.result))
+            self.client.set(entry.key, self._sign(entry.key, payload))
+        except Exception:
+            # Unserializable results or an unreachable server just aren't shared.
+            pass
+
+    def memoize(self, func: Callable, *, expiration: int = None) -> Callable:
+        """Memoize a function, sharing its results via the cache server.
+
+        Unlike a local cache, `expiration` doesn't slide forward on each hit: a
+        result expires `expiration` seconds after it was computed, on every host.
+        """
+        if inspect.isgeneratorfunction(func):
+            raise TypeError(
+                f"Can't share the output of generator function {func.__qualname__!r}, "
+                "use a local cache instead."
+            )
+        func.cache = self
+        sig = inspect.signature(func)
+
+        def _lookup(args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Any, bool, float]:
+            try:
+                key = self._key(func, sig.bind(*args, **kwargs))
+            # received an unserializable input, can't cache this.
+            except Exception:
+                with self._lock:
+                    self._misses += 1
+                start = perf_counter()
+                result = func(*args, **kwargs)
+                return result, False, perf_counter() - start
+
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and _expired(entry):
+                    # Don't refresh locally, another host may have done so already.
+                    del self[key]
+                elif entry is not None:
+                    self._cache.move_to_end(key)
+                    self._base_hits += 1
+                    entry.last_used = time()
+                    return entry.result, True, entry.duration
+
+            found, reachable = self._fetch(key)
+            if found is not None:
+                duration, expires, result = found
+                entry = protos.CacheEntry(
+                    func=func,
+                    key=key,
+                    duration=duration,
+                    result=result,
+                    args=args,
+                    kwargs=kwargs,
+                    strategy=self.strategy,
+                )
+            else:
+                expires = time() + expiration if expiration else None
+                entry = protos._create_entry(
+                    func=func,
+                    key=key,
+                    args=args,
+                    kwargs=kwargs,
+                    strategy=self.strategy,
+                )
+                if reachable:
+                    self._push(entry, expires)
+            if expires is not None:
+                entry.ttl = expires
+
+            with self._lock:
+                if found is not None:
+                    self._base_hits += 1
+                else:
+                    self._misses += 1
+                self[key] = entry
+                self.shrink()
+            return entry.result, found is not None, entry.duration
+
+        @functools.wraps(func)
+        def _memoized(*args, **kwargs) -> Any:
+            if profiler.enabled:
+                return profiler.call(func, self, _lookup, args, kwargs)
+            return _lookup(args, kwargs)[0]
+
+        return _memoized
+
+
+def memoize(
+    _func: Callable = None,
+    *,
+    address: Address,
+    serializer: Any = pickle,
+    near_size: int = _DEFAULT_NEAR_SIZE,
+    timeout: float = _DEFAULT_TIMEOUT,
+    secret: bytes = None,
+) -> Callable:
+    cache = RemoteCache(
+        address,
+        serializer=serializer,
+        near_size=near_size,
+        timeout=timeout,
+        secret=secret,
+    )
+
+    return cache.memoize(_func) if _func else cache.memoize
+
+
+def main(argv: List[str] = None):  # pragma: nocover
+    parser = argparse.ArgumentParser(description="Run a reckon cache server.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--unix", help="Listen on this Unix socket path.")
+    group.add_argument("--port", type=int, help="Listen on this TCP port.")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen on this host.")
+    parser.add_argument("--max-size", type=int, help="Max bytes to store.")
+    args = parser.parse_args(argv)
+    address = args.unix or (args.host, args.port)
+    server = CacheServer(address, max_size=args.max_size)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":  # pragma: nocover
+    main()
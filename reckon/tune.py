@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Automatically size caches based upon their estimated miss-ratio curves.
+
+Each tuned cache gets a :py:class:`Sampler`, which uses SHARDS-style spatial
+sampling: only keys whose hash falls under a threshold are tracked, so roughly
+`rate` of all keys are observed, and every sampled key is observed on every access.
+Sampled keys are kept as "ghost" entries (key, size and compute time, but no result)
+in an LRU stack, even after the real entry is evicted. The stack distance (in bytes)
+at which a key is re-used, scaled by ``1 / rate``, is the smallest cache which would
+have served that access as a hit. From those distances we get a miss-ratio curve, and
+the compute time each cache size would save.
+
+A :py:class:`Tuner` then divides a global memory budget between caches, greedily
+handing out slices of memory to whichever cache saves the most time with it.
+"""
+import collections
+import math
+import statistics
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from . import glob, protos
+
+__all__ = ("MissRatioCurve", "Sampler", "Tuner")
+
+
+_MODULUS = 1 << 24
+# A large odd constant (derived from the golden ratio) to spread out hash values.
+_SPREAD = 0x9E3779B97F4A7C15
+# Distances are bucketed on a log scale, with this many buckets per doubling.
+_BUCKETS_PER_DOUBLING = 4
+_DEFAULT_SAMPLE_RATE = 0.01
+_DEFAULT_MAX_GHOSTS = 8192
+_DEFAULT_INTERVAL = 60.0
+_DEFAULT_STEPS = 64
+
+
+def _bucket(distance: float) -> int:
+    return int(math.log2(distance + 1) * _BUCKETS_PER_DOUBLING)
+
+
+def _bucket_bound(bucket: int) -> float:
+    """The largest distance which falls in the given bucket."""
+    return 2 ** ((bucket + 1) / _BUCKETS_PER_DOUBLING) - 1
+
+
+class MissRatioCurve(NamedTuple):
+    """An estimated miss-ratio curve for a single cache.
+
+    `sizes` are cache sizes in bytes, in ascending order. `miss_ratios` and `saved`
+    are the estimated miss ratio and compute time saved (in seconds, per observation
+    period) for a cache of that size.
+    """
+
+    sizes: Tuple[float, ...]
+    miss_ratios: Tuple[float, ...]
+    saved: Tuple[float, ...]
+    accesses: int
+
+    def _index(self, size: float) -> int:
+        lo, hi = 0, len(self.sizes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.sizes[mid] <= size:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def miss_ratio(self, size: float) -> float:
+        i = self._index(size)
+        return self.miss_ratios[i] if i >= 0 else 1.0
+
+    def time_saved(self, size: float) -> float:
+        i = self._index(size)
+        return self.saved[i] if i >= 0 else 0.0
+
+
+class Sampler:
+    """Estimate the miss-ratio curve of a cache by sampling its accesses."""
+
+    def __init__(
+        self,
+        *,
+        rate: float = _DEFAULT_SAMPLE_RATE,
+        max_ghosts: int = _DEFAULT_MAX_GHOSTS,
+    ):
+        self.rate = rate
+        self.max_ghosts = max_ghosts
+        self._threshold = int(rate * _MODULUS)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything, starting a new observation period."""
+        with self._lock:
+            # key -> (size, duration)
+            self._ghosts: Dict = collections.OrderedDict()
+            self._hits: Dict[int, int] = collections.Counter()
+            self._saved: Dict[int, float] = collections.Counter()
+            self._accesses = 0
+
+    def sampled(self, key) -> bool:
+        return ((hash(key) * _SPREAD) >> 16) % _MODULUS < self._threshold
+
+    def record(self, key, entry: protos.CacheEntry):
+        """Record an access of `key`, which resolved to `entry`."""
+        if not self.sampled(key):
+            return
+        ghost = (entry.size, entry.duration)
+        with self._lock:
+            self._accesses += 1
+            ghosts = self._ghosts
+            if key in ghosts:
+                distance = 0
+                for other in reversed(ghosts):
+                    if other == key:
+                        break
+                    distance += ghosts[other][0]
+                # a cache must be able to hold the re-used entry as well.
+                bucket = _bucket(distance / self.rate + ghost[0])
+                self._hits[bucket] += 1
+                self._saved[bucket] += ghost[1]
+                ghosts.move_to_end(key)
+            elif len(ghosts) >= self.max_ghosts:
+                ghosts.popitem(last=False)
+            ghosts[key] = ghost
+
+    def durations(self) -> List[float]:
+        with self._lock:
+            return [d for _, d in self._ghosts.values()]
+
+    def curve(self) -> MissRatioCurve:
+        with self._lock:
+            buckets = sorted(self._hits)
+            accesses = self._accesses
+            hits, saved = self._hits.copy(), self._saved.copy()
+        sizes, miss_ratios, time_saved = [], [], []
+        total_hits, total_saved = 0, 0.0
+        for bucket in buckets:
+            total_hits += hits[bucket]
+            total_saved += saved[bucket]
+            sizes.append(_bucket_bound(bucket))
+            miss_ratios.append(1 - total_hits / accesses)
+            time_saved.append(total_saved / self.rate)
+        return MissRatioCurve(
+            sizes=tuple(sizes),
+            miss_ratios=tuple(miss_ratios),
+            saved=tuple(time_saved),
+            accesses=round(accesses / self.rate),
+        )
+
+    def recommend(self) -> protos.CacheStrategy:
+        """Recommend a caching strategy based upon the observed compute times.
+
+        If compute times vary widely, a cost-aware (dynamic) strategy will retain
+        the entries which are most expensive to re-compute. Otherwise, plain recency
+        is just as good and cheaper to maintain.
+        """
+        durations = self.durations()
+        if len(durations) > 1:
+            mean = statistics.mean(durations)
+            if mean and statistics.pstdev(durations) / mean > 1:
+                return protos.CacheStrategy.DYN
+        return protos.CacheStrategy.LRU
+
+
+class Tuner:
+    """Periodically rebalance memory budgets between caches.
+
+    Budgets are applied as each cache's `max_size`. If `total` isn't given, it's the
+    amount of memory the caches may use before system memory usage exceeds
+    `target_ratio` (as a percentage). If `switch_strategy` is set, each cache is
+    also switched to the strategy recommended by its sampler, and its existing
+    entries are re-scored to match.
+    """
+
+    def __init__(
+        self,
+        caches: Iterable[protos.ProtoCache] = None,
+        *,
+        total: int = None,
+        target_ratio: float = protos.ProtoCache.TARGET_RATIO,
+        rate: float = _DEFAULT_SAMPLE_RATE,
+        interval: float = _DEFAULT_INTERVAL,
+        steps: int = _DEFAULT_STEPS,
+        switch_strategy: bool = False,
+    ):
+        self.total = total
+        self.target_ratio = target_ratio
+        self.rate = rate
+        self.interval = interval
+        self.steps = steps
+        self.switch_strategy = switch_strategy
+        self.caches: List[protos.ProtoCache] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for cache in caches if caches is not None else (glob.cache,):
+            self.attach(cache)
+
+    def attach(self, cache: protos.ProtoCache):
+        with cache._lock:
+            cache._sampler = Sampler(rate=self.rate)
+        self.caches.append(cache)
+
+    def detach(self, cache: protos.ProtoCache):
+        with cache._lock:
+            cache._sampler = None
+        self.caches = [c for c in self.caches if c is not cache]
+
+    def _drain(self):
+        # Hits are only sampled once they're drained from the caches' read buffers.
+        for cache in self.caches:
+            protos.drain_read_buffers(cache)
+
+    def curves(self) -> List[Tuple[protos.ProtoCache, MissRatioCurve]]:
+        self._drain()
+        return [(c, c._sampler.curve()) for c in self.caches]
+
+    def recommend(self) -> List[Tuple[protos.ProtoCache, protos.CacheStrategy]]:
+        self._drain()
+        return [(c, c._sampler.recommend()) for c in self.caches]
+
+    def _total(self) -> int:
+        if self.total is not None:
+            return self.total
+        mem = protos._get_mem()
+        held = sum(protos.entries_size(c) for c in self.caches)
+        allowed = mem.total * self.target_ratio / 100 - (mem.used - held)
+        return max(int(allowed), 0)
+
+    def plan(self) -> List[Tuple[protos.ProtoCache, int]]:
+        """Divide the total budget to maximize the estimated compute time saved.
+
+        Caches are mappings, so they aren't hashable. The plan is a list of
+        ``(cache, budget)`` pairs, in the same order as :py:attr:`caches`.
+        """
+        curves = [curve for _, curve in self.curves()]
+        total = self._total()
+        step = total / self.steps
+        budgets = [0.0] * len(curves)
+        for _ in range(self.steps):
+            gains = [
+                curve.time_saved(budget + step) - curve.time_saved(budget)
+                for curve, budget in zip(curves, budgets)
+            ]
+            if not gains or max(gains) <= 0:
+                break
+            budgets[gains.index(max(gains))] += step
+        # Nothing more to gain from the rest, so share it out evenly.
+        leftover = total - sum(budgets)
+        if budgets and leftover > 0:
+            budgets = [b + leftover / len(budgets) for b in budgets]
+        return [(c, int(b)) for c, b in zip(self.caches, budgets)]
+
+    def rebalance(self) -> List[Tuple[protos.ProtoCache, int]]:
+        """Apply a new plan to the caches and start a new observation period."""
+        plan = self.plan()
+        for cache, budget in plan:
+            if self.switch_strategy:
+                protos.set_strategy(cache, cache._sampler.recommend())
+            protos.set_max_size(cache, budget)
+            cache._sampler.reset()
+        return plan
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.rebalance()
+
+    def start(self) -> "Tuner":
+        """Rebalance every `interval` seconds in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop tuning and detach from all caches, leaving their budgets in place."""
+        self.stop()
+        for cache in [*self.caches]:
+            self.detach(cache)
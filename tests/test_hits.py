@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import threading
+import time
+
+import reckon
+from reckon import protos
+
+cache = reckon.local()
+
+
+@cache.memoize
+def ident(x):
+    return x
+
+
+def setup_function():
+    cache.clear()
+
+
+def test_hit_without_lock():
+    ident(1)
+    results = []
+    with cache._lock:
+        thread = threading.Thread(target=lambda: results.append(ident(1)))
+        thread.start()
+        thread.join(timeout=1)
+        assert results == [1]
+    assert cache.info().hits == 1
+
+
+def test_hits_drained():
+    ident(1)
+    (entry,) = cache.values()
+    last_used = entry.last_used
+    [ident(1) for _ in range(3)]
+    assert entry.uses == 0
+    cache.shrink()
+    assert entry.uses == 3
+    assert entry.last_used > last_used
+
+
+def test_hits_lossy_buffer_counts():
+    ident(1)
+    n = protos._READ_BUFFER_SIZE * 3
+    [ident(1) for _ in range(n)]
+    (entry,) = cache.values()
+    assert cache.info().hits == n
+    assert 0 < entry.uses <= n
+
+
+def test_hits_many_threads():
+    [ident(x) for x in range(8)]
+
+    def worker():
+        for _ in range(100):
+            [ident(x) for x in range(8)]
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.info().hits == 4 * 100 * 8
+    cache.shrink()
+    assert not cache._read_buffers or all(
+        t.is_alive() for t in (b.owner() for b in cache._read_buffers)
+    )
+    assert cache.info().hits == 4 * 100 * 8
+
+
+def test_hits_exact_across_paths():
+    # Expired entries are refreshed (and counted) under the lock, fresh ones aren't.
+    expiring = cache.memoize(lambda x: x, expiration=0.0001)
+    expiring(1)
+
+    def worker():
+        for _ in range(500):
+            expiring(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    info = cache.info()
+    assert (info.hits, info.misses) == (4 * 500, 1)
+
+
+def test_hits_slide_ttl():
+    expiring = cache.memoize(lambda x: object(), expiration=0.05)
+    first = expiring(1)
+    for _ in range(5):
+        time.sleep(0.02)
+        assert expiring(1) is first
+
+
+def test_clear_drops_recorded_hits():
+    ident(1)
+    ident(1)
+    cache.clear()
+    assert not any(b.entries for b in cache._read_buffers)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import gc
+import weakref
+
+import pytest
+
+import reckon
+
+cache = reckon.local()
+
+
+class Point:
+    # Unhashable, since it defines __eq__ without __hash__.
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+        self.calls = 0
+
+    def __eq__(self, other):
+        return (self.x, self.y) == (other.x, other.y)
+
+    @cache.memoize_method
+    def scale(self, factor):
+        self.calls += 1
+        return self.x * factor, self.y * factor
+
+    @cache.cached_property
+    def norm(self):
+        """The euclidean norm."""
+        self.calls += 1
+        return (self.x ** 2 + self.y ** 2) ** 0.5
+
+
+def setup_function():
+    cache.clear()
+
+
+def test_method_cached_per_instance():
+    a, b = Point(1, 2), Point(1, 2)
+    assert a.scale(2) == (2, 4)
+    assert a.scale(factor=2) == (2, 4)
+    assert b.scale(2) == (2, 4)
+    assert (a.calls, b.calls) == (1, 1)
+    assert cache.info().hits == 1
+
+
+def test_cached_property():
+    a = Point(3, 4)
+    assert a.norm == 5.0
+    assert a.norm == 5.0
+    assert a.calls == 1
+    assert Point.norm.__doc__ == "The euclidean norm."
+
+
+def test_instance_not_retained():
+    a = Point(1, 2)
+    a.scale(2)
+    a.norm
+    ref = weakref.ref(a)
+    assert len(cache) == 2
+    del a
+    gc.collect()
+    assert ref() is None
+    cache.shrink()
+    assert len(cache) == 0
+
+
+def test_collected_instance_not_confused():
+    for n in range(10):
+        # A new instance is likely to get the id of the last, collected one.
+        assert Point(n, n).scale(2) == (n * 2, n * 2)
+    assert cache.info().misses == 10
+
+
+def test_unreferenceable_instance_not_cached():
+    class Slotted:
+        __slots__ = ("x",)
+
+        def __init__(self, x):
+            self.x = x
+
+        @cache.memoize_method
+        def double(self):
+            return self.x * 2
+
+    assert Slotted(2).double() == 4
+    assert not cache.keys()
+    assert cache.info().misses == 1
+
+
+def test_generator_method_rejected():
+    with pytest.raises(TypeError):
+
+        @cache.memoize_method
+        def gen(self):
+            yield self
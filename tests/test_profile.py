@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import time
+
+import reckon
+
+cache = reckon.local()
+
+
+@cache.memoize
+def slow(n):
+    time.sleep(0.01)
+    return n
+
+
+@cache.memoize
+def fast(n):
+    return n
+
+
+@cache.memoize
+def stream(n):
+    for i in range(n):
+        time.sleep(0.01)
+        yield i
+
+
+def setup_function():
+    cache.clear()
+    reckon.profile.reset()
+
+
+def teardown_function():
+    reckon.profile.disable()
+
+
+def test_profile_disabled_by_default():
+    fast(1)
+    assert not reckon.profile.report()
+
+
+def test_profile_records_calls():
+    with reckon.profile:
+        [slow(n) for n in (1, 1, 1, 2)]
+    stats, = reckon.profile.report()
+    assert stats.func is slow.__wrapped__
+    assert stats.hits == 2
+    assert stats.misses == 2
+    assert stats.hit_ratio == 0.5
+    assert stats.compute >= 0.02
+    assert stats.saved >= 0.02
+    assert stats.size == sum(x.size for x in cache.values())
+
+
+def test_profile_ranks_and_flags():
+    with reckon.profile:
+        [slow(1) for _ in range(10)]
+        [fast(n) for n in range(10)]
+    report = reckon.profile.report()
+    assert [x.func for x in report] == [slow.__wrapped__, fast.__wrapped__]
+    assert [x.func for x in reckon.profile.flagged()] == [fast.__wrapped__]
+    assert "fast" in reckon.profile.format_report()
+
+
+def test_profile_stream():
+    with reckon.profile:
+        [list(stream(2)) for _ in range(3)]
+    (stats,) = reckon.profile.report()
+    assert stats.hits == 2
+    assert stats.saved >= 0.04
+    assert stats.worthwhile
+
+
+def test_profile_remote_evictions(tmp_path):
+    with reckon.rem.CacheServer(str(tmp_path / "reckon.sock")) as server:
+        remote = reckon.remote(server.address, near_size=2)
+        ident = remote.memoize(fast.__wrapped__)
+        with reckon.profile:
+            [ident(n) for n in range(5)]
+    (stats,) = reckon.profile.report()
+    assert stats.evictions == 3
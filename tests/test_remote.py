@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import reckon
+from reckon import rem
+
+
+@pytest.fixture
+def server(tmp_path):
+    with rem.CacheServer(str(tmp_path / "reckon.sock")) as server:
+        yield server
+
+
+@pytest.fixture
+def tcp_server():
+    with rem.CacheServer(("127.0.0.1", 0)) as server:
+        yield server
+
+
+def test_client_roundtrip(tcp_server):
+    client = rem.CacheClient(tcp_server.address)
+    client.set(b"foo", b"bar")
+    assert client.get(b"foo") == b"bar"
+    assert client.get(b"baz") is None
+    client.delete(b"foo")
+    assert client.get(b"foo") is None
+
+
+def test_client_multi(server):
+    client = rem.CacheClient(server.address, batch_size=3)
+    mapping = {str(i).encode(): str(i * 2).encode() for i in range(10)}
+    client.set_many(mapping)
+    assert client.get_many([*mapping, b"missing"]) == mapping
+    assert client.info()["entries"] == 10
+    client.clear()
+    assert client.get_many(mapping) == {}
+
+
+def test_server_max_size(server):
+    server.max_size = 10
+    client = rem.CacheClient(server.address)
+    client.set_many({b"a": b"12345", b"b": b"12345"})
+    client.get(b"a")
+    client.set(b"c", b"12345")
+    assert [*client.get_many([b"a", b"b", b"c"])] == [b"a", b"c"]
+
+
+def test_remote_cache_shared(server):
+    calls = []
+
+    def add(a, b):
+        calls.append((a, b))
+        return a + b
+
+    first = reckon.remote(server.address).memoize(add)
+    second = reckon.remote(server.address).memoize(add)
+    assert first(1, 2) == 3
+    assert second(1, 2) == 3
+    assert second(a=1, b=2) == 3
+    assert calls == [(1, 2)]
+    assert second.cache.info().hits == 2
+
+
+def test_remote_cache_serializer(server):
+    class Serializer:
+        dumps = staticmethod(lambda o: json.dumps(o).encode())
+        loads = staticmethod(json.loads)
+
+    cache = reckon.remote(server.address, serializer=Serializer)
+    square = cache.memoize(lambda x: [x * x])
+    assert square(3) == [9]
+    cache._cache.clear()
+    assert square(3) == [9]
+    assert cache.info().hits == 1
+
+
+def test_remote_cache_near_size(server):
+    cache = reckon.remote(server.address, near_size=2)
+    ident = cache.memoize(lambda x: x)
+    [ident(x) for x in range(5)]
+    assert len(cache) == 2
+
+
+def test_remote_cache_unreachable(tmp_path):
+    cache = reckon.remote(str(tmp_path / "nothing.sock"))
+    calls = []
+
+    @cache.memoize
+    def ident(x):
+        calls.append(x)
+        return x
+
+    assert ident(1) == 1
+    assert ident(1) == 1
+    assert calls == [1]
+    assert cache.info().misses == 1
+
+
+def _key_in_process(seed: str) -> bytes:
+    script = (
+        "import sys; from reckon import rem; "
+        "cache = rem.RemoteCache('unused'); "
+        "bound = rem.inspect.signature(len).bind({'a', 'b', 'c', frozenset('xyz')}); "
+        "sys.stdout.write(cache._key(len, bound).hex())"
+    )
+    env = {**os.environ, "PYTHONHASHSEED": seed}
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, check=True
+    )
+    return output.stdout
+
+
+def test_remote_cache_key_stable_across_processes():
+    assert len({_key_in_process(seed) for seed in ("0", "1", "2", "3")}) == 1
+
+
+def test_remote_cache_generator(server):
+    cache = reckon.remote(server.address)
+
+    def gen():
+        yield 1
+
+    with pytest.raises(TypeError):
+        cache.memoize(gen)
+
+
+def test_remote_cache_corrupt_payload(server):
+    cache = reckon.remote(server.address)
+    calls = []
+
+    @cache.memoize
+    def ident(x):
+        calls.append(x)
+        return x
+
+    assert ident(1) == 1
+    (key,) = server._store
+    cache.client.set(key, b"\x80\x04garbage")
+    cache._cache.clear()
+    assert ident(1) == 1
+    assert calls == [1, 1]
+    cache._cache.clear()
+    assert ident(1) == 1
+    assert calls == [1, 1]
+
+
+def test_remote_cache_expiration(server):
+    counter = itertools.count()
+
+    def tick(x):
+        return next(counter)
+
+    first = reckon.remote(server.address).memoize(tick, expiration=0.05)
+    assert first(1) == 0
+    assert reckon.remote(server.address).memoize(tick, expiration=0.05)(1) == 0
+    time.sleep(0.06)
+    assert first(1) == 1
+    assert first(1) == 1
+    assert reckon.remote(server.address).memoize(tick, expiration=0.05)(1) == 1
+
+
+def test_remote_cache_tcp_requires_secret(tcp_server):
+    with pytest.raises(ValueError):
+        reckon.remote(tcp_server.address)
+
+
+def test_remote_cache_signed(tcp_server):
+    calls = []
+
+    def ident(x):
+        calls.append(x)
+        return x
+
+    signed = reckon.remote(tcp_server.address, secret=b"s3cret").memoize(ident)
+    assert signed(1) == 1
+    assert signed(2) == 2
+    one, two = tcp_server._store
+    other = reckon.remote(tcp_server.address, secret=b"s3cret").memoize(ident)
+    assert other(1) == 1
+    assert calls == [1, 2]
+
+    # Forged, or replayed under another key.
+    other.cache.client.set(one, tcp_server._store[two])
+    other.cache._cache.clear()
+    assert other(1) == 1
+    wrong = reckon.remote(tcp_server.address, secret=b"wrong").memoize(ident)
+    assert wrong(2) == 2
+    assert calls == [1, 2, 1, 2]
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import itertools
+import threading
+import time
+
+import reckon
+
+cache = reckon.local()
+calls = []
+
+
+@cache.memoize
+def count(n):
+    calls.append(n)
+    for i in range(n):
+        yield i
+
+
+def short(n):
+    calls.append(n)
+    yield from range(n)
+
+
+def sleepy(n):
+    for i in range(n):
+        time.sleep(0.01)
+        yield i
+
+
+def setup_function():
+    cache.clear()
+    calls.clear()
+
+
+def test_stream_replayed():
+    assert list(count(5)) == list(range(5))
+    assert list(count(5)) == list(range(5))
+    assert calls == [5]
+    assert cache.info().hits == 1
+
+
+def test_stream_is_lazy():
+    first = count(5)
+    assert next(first) == 0
+    second = count(5)
+    assert list(second) == list(range(5))
+    assert list(first) == list(range(1, 5))
+    assert calls == [5]
+
+
+def test_stream_concurrent_consumers():
+    results = []
+
+    def consume():
+        results.append(list(count(100)))
+
+    threads = [threading.Thread(target=consume) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [list(range(100))] * 8
+    assert calls == [100]
+
+
+def test_stream_over_limit_not_cached():
+    limited = cache.memoize(short, stream_limit=3)
+    first = limited(5)
+    second = limited(5)
+    assert next(second) == 0
+    assert list(first) == list(range(5))
+    assert list(second) == list(range(1, 5))
+    assert not cache.keys()
+    assert list(limited(5)) == list(range(5))
+
+
+def test_stream_abandoned_over_limit_not_cached():
+    limited = cache.memoize(short, stream_limit=3)
+    assert list(itertools.islice(limited(10), 4)) == [0, 1, 2, 3]
+    assert not cache.keys()
+    assert list(limited(10)) == list(range(10))
+    assert cache.info().hits == 0
+    assert cache.info().misses == 2
+
+
+def test_stream_duration():
+    slow = cache.memoize(sleepy)
+    stream = slow(3)
+    (entry,) = cache.values()
+    assert entry.duration < 0.01
+    assert list(stream) == [0, 1, 2]
+    assert entry.duration >= 0.03
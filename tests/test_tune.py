@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import time
+
+import reckon
+from reckon import protos, tune
+
+
+def test_max_size():
+    cache = reckon.local(max_size=2_000)
+    ident = cache.memoize(lambda x: "x" * x)
+    [ident(500) for _ in range(3)]
+    [ident(n) for n in range(501, 510)]
+    assert sum(x.size for x in cache.values()) <= 2_000
+    cache.set_max_size(0)
+    assert not cache.keys()
+
+
+def test_max_size_evicts_least_recently_used():
+    cache = reckon.local(strategy=reckon.CacheStrategy.LRU)
+    kilobyte = cache.memoize(lambda n: str(n) * 1_000)
+    for n in (1, 2, 3):
+        kilobyte(n)
+        time.sleep(0.01)
+    kilobyte(1)
+    cache.set_max_size(2_500)
+    assert sorted(x.args for x in cache.values()) == [(1,), (3,)]
+
+
+def test_max_size_evicts_least_valuable():
+    cache = reckon.local()
+    kilobyte = cache.memoize(lambda n: str(n) * 1_000)
+    for n in (1, 2, 3):
+        kilobyte(n)
+        time.sleep(0.02)
+    kilobyte(1)
+    kilobyte(1)
+    cache.set_max_size(2_500)
+    assert sorted(x.args for x in cache.values()) == [(1,), (3,)]
+
+
+def test_max_size_coarse_clock(monkeypatch):
+    # Entries used within the clock's resolution have no age.
+    monkeypatch.setattr(protos, "time", lambda: 1.0)
+    cache = reckon.local(max_size=3_000)
+    kilobyte = cache.memoize(lambda n: str(n) * 1_000)
+    [kilobyte(n) for n in range(5)]
+    assert len(cache) < 5
+
+
+def test_max_size_running_total():
+    cache = reckon.local(max_size=5_000)
+    ident = cache.memoize(lambda x: "x" * x)
+    [ident(n) for n in range(100, 2_000, 100)]
+    del cache[[*cache.keys()][0]]
+    assert cache._bytes == sum(x.size for x in cache.values())
+    cache.clear()
+    assert cache._bytes == 0
+    cache.set_max_size(None)
+    assert cache._bytes is None
+
+
+def test_miss_ratio_curve():
+    cache = reckon.local()
+    tuner = tune.Tuner([cache], rate=1.0)
+    ident = cache.memoize(lambda x: x)
+    for _ in range(10):
+        [ident(n) for n in range(10)]
+    ((_, curve),) = tuner.curves()
+    assert curve.accesses == 100
+    assert curve.miss_ratio(0) == 1.0
+    assert round(curve.miss_ratio(curve.sizes[-1]), 6) == 0.1
+    assert cache._sampler.recommend() == reckon.CacheStrategy.LRU
+
+
+def test_rebalance():
+    hot, cold = reckon.local(), reckon.local()
+
+    @hot.memoize
+    def slow(n):
+        time.sleep(0.001)
+        return n
+
+    @cold.memoize
+    def scan(n):
+        return n
+
+    tuner = tune.Tuner([hot, cold], total=10_000, rate=1.0, steps=10)
+    for _ in range(5):
+        [slow(n) for n in range(5)]
+    [scan(n) for n in range(100)]
+
+    plan = tuner.rebalance()
+    assert [c for c, _ in plan] == [hot, cold]
+    (_, hot_budget), (_, cold_budget) = plan
+    assert hot_budget > cold_budget
+    assert hot.max_size == hot_budget
+    assert cold.max_size == cold_budget
+    assert hot._sampler.curve().accesses == 0
+    tuner.close()
+    assert hot._sampler is None
+
+
+def test_switch_strategy_rescores_entries():
+    cache = reckon.local()
+    tuner = tune.Tuner([cache], total=10_000, rate=1.0, switch_strategy=True)
+    ident = cache.memoize(lambda x: x)
+    [ident(n) for n in range(3)]
+    tuner.rebalance()
+    assert cache.strategy == reckon.CacheStrategy.LRU
+    assert {x.strategy for x in cache.values()} == {reckon.CacheStrategy.LRU}
+    assert [x.args for x in cache.values()] == [(0,), (1,), (2,)]
+    tuner.close()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import threading
+import time
+
+import pytest
+
+import reckon
+
+cache = reckon.local()
+active = []
+lock = threading.Lock()
+
+
+@cache.memoize
+def slow(n, pad=0):
+    with lock:
+        active.append(n)
+    time.sleep(0.01)
+    return "x" * pad + str(n)
+
+
+@cache.memoize
+def double(n):
+    return n * 2
+
+
+def setup_function():
+    cache.clear()
+    cache.set_max_size(None)
+    active.clear()
+
+
+def test_warm():
+    slow(0)
+    before = sum(x.size for x in cache.values())
+    reports = []
+    report = cache.warm(slow, [0, 1, (2,), {"n": 3}, [4]], progress=reports.append)
+    assert report.total == 5
+    assert report.computed == 3
+    assert report.skipped == 1
+    assert report.failed == 1
+    assert not report.stopped
+    assert report.size == sum(x.size for x in cache.values()) - before
+    assert len(reports) == 5
+    assert sorted(active) == [0, 1, 2, 3]
+    slow(1)
+    assert cache.info().hits == 1
+
+
+def test_warm_concurrent():
+    start = time.time()
+    report = cache.warm(slow, range(20), workers=10)
+    assert report.computed == 20
+    assert time.time() - start < 0.01 * 20
+    assert report.compute >= 0.01 * 20
+
+
+def test_warm_budget():
+    report = cache.warm(slow, ((n, 1000) for n in range(20)), workers=2, budget=3000)
+    assert report.stopped
+    assert 0 < report.computed < 20
+    assert report.size <= 3000
+
+
+def test_warm_max_size():
+    cache.set_max_size(3000)
+    report = cache.warm(slow, ((n, 1000) for n in range(20)), workers=2)
+    assert report.stopped
+    assert sum(x.size for x in cache.values()) <= 3000
+
+
+def test_warm_processes():
+    report = cache.warm(double, range(4), workers=2, processes=True)
+    assert report.computed == 4
+    assert double(3) == 6
+    assert cache.info().hits == 1
+
+
+def test_warm_generator():
+    gen = cache.memoize(lambda n: (yield n))
+    with pytest.raises(TypeError):
+        cache.warm(gen, range(2))
+
+
+def test_warm_expiration():
+    expiring = cache.memoize(lambda n: n, expiration=60)
+    cache.warm(expiring, range(2))
+    assert [x.expiration for x in cache.values()] == [60, 60]
+    assert all(x.ttl is not None for x in cache.values())
+
+
+def test_warm_other_cache():
+    other = reckon.local().memoize(lambda n: n)
+    with pytest.raises(ValueError):
+        cache.warm(other, range(2))